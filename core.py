@@ -0,0 +1,764 @@
+"""
+Shared core of the engineered chatgpt prompts tool: OpenAI access,
+caching, prompt construction and the file/directory processing paths.
+Both the command line entry script and the GUI import from here, so
+there is a single module instance holding the client and the cache.
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import mmap
+import os
+import pathlib
+import re
+import sys
+import tempfile
+import time
+
+import aiofiles
+import tiktoken
+from dotenv import load_dotenv, find_dotenv
+
+_ = load_dotenv(find_dotenv())  # read local .env file
+# default_openai_model = "gpt-4o"
+default_openai_model = "gpt-3.5-turbo"
+# default_openai_model = "text-embedding-3-small"
+# default_openai_model = "text-embedding-3-large"
+# default_openai_model = "gpt-4-1106-vision-preview"
+
+_client = None  # pylint: disable=invalid-name
+
+
+def _get_client():
+    """
+    create the AsyncOpenAI client on first use, so runs that never hit
+    the network (--help, full cache hits) never pay the openai import
+    :return:
+        shared AsyncOpenAI client
+    """
+    global _client  # pylint: disable=global-statement
+    if _client is None:
+        import httpx
+        import openai
+        print("OpenAI version:", openai.__version__)
+        # HTTP/2 multiplexes concurrent requests over one TCP+TLS
+        # connection, so gather-based dispatch skips the extra
+        # per-connection TLS handshakes
+        _client = openai.AsyncOpenAI(
+            api_key=os.getenv('OPENAI_API_KEY'),
+            organization=os.getenv('OPENAI_ORGANIZATION'),
+            project=os.getenv('OPENAI_PROJECT'),
+            http_client=httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=64,
+                                    max_keepalive_connections=32)))
+    return _client
+
+
+# files above this size are memory-mapped instead of read()
+LARGE_FILE_THRESHOLD = 1024 * 1024
+
+# context budget of the default model and room reserved for the answer
+MODEL_CONTEXT_LIMIT = 16385
+MAX_COMPLETION_TOKENS = 4096
+
+# static prefix shared by every request; keeping it (and the goal) at the
+# very start of the first message lets OpenAI prompt caching reuse the
+# prefix across the files of a directory run
+FIXED_INSTRUCTIONS = ("Process the text of the user message"
+                      " according to the following goal:\n")
+
+
+@functools.lru_cache(maxsize=32)
+def system_content(goal_text: str) -> str:
+    """
+    static system prefix of a goal; joined and memoized once per goal
+    instead of re-concatenated for every file
+    :param goal_text:
+        goal text
+    :return:
+        system message content
+    """
+    return "".join((FIXED_INSTRUCTIONS, goal_text))
+
+
+def build_messages(goal_text: str, file_text: str) -> list:
+    """
+    build chat messages with the static goal as prefix and the
+    variable text as suffix
+    :param goal_text:
+        goal text (identical for every file of a run)
+    :param file_text:
+        text to process
+    :return:
+        list of chat messages
+    """
+    return [
+        {"role": "system", "content": system_content(goal_text)},
+        {"role": "user", "content": file_text},
+    ]
+
+
+@functools.lru_cache(maxsize=4)
+def _encoding(model: str = default_openai_model):
+    """
+    memoized tiktoken encoding of a model
+    :param model:
+        model name
+    :return:
+        tiktoken Encoding
+    """
+    return tiktoken.encoding_for_model(model)
+
+
+def count_tokens(text: str, model: str = default_openai_model) -> int:
+    """
+    count the tokens of a text locally, without a network round trip
+    :param text:
+        text to measure
+    :param model:
+        model whose tokenizer is used
+    :return:
+        number of tokens
+    """
+    return len(_encoding(model).encode(text))
+
+
+def split_to_windows(text: str, max_tokens: int,
+                     model: str = default_openai_model) -> list:
+    """
+    split an oversize text into windows fitting a token budget,
+    preferring paragraph boundaries
+    :param text:
+        text to split
+    :param max_tokens:
+        token budget of one window
+    :param model:
+        model whose tokenizer sizes the windows
+    :return:
+        list of text windows
+    """
+    enc = _encoding(model)
+    windows = []
+    current = []
+    used = 0
+    for paragraph in text.split('\n\n'):
+        size = len(enc.encode(paragraph)) + 2  # separator tokens
+        if size > max_tokens:
+            # paragraph alone exceeds the budget: hard-split its tokens
+            if current:
+                windows.append('\n\n'.join(current))
+                current = []
+                used = 0
+            tokens = enc.encode(paragraph)
+            for index in range(0, len(tokens), max_tokens):
+                windows.append(enc.decode(tokens[index:index + max_tokens]))
+            continue
+        if current and used + size > max_tokens:
+            windows.append('\n\n'.join(current))
+            current = []
+            used = 0
+        current.append(paragraph)
+        used += size
+    if current:
+        windows.append('\n\n'.join(current))
+    return windows
+
+
+def goal_cache_key(goal_text: str) -> str:
+    """
+    derive a stable prompt_cache_key from the goal text so requests
+    sharing a goal land on the same prompt-cache shard
+    :param goal_text:
+        goal text
+    :return:
+        32 hex chars key
+    """
+    return hashlib.sha256(goal_text.encode()).hexdigest()[:32]
+
+
+class LLMCache:
+    """
+    on-disk cache for completions; with temperature=0 the response is a
+    pure function of (model, messages), so repeat prompts can be served
+    locally with zero tokens billed
+    """
+
+    def __init__(self, cache_dir=None, ttl_days: float = 7):
+        self.cache_dir = pathlib.Path(
+            cache_dir or os.path.expanduser(
+                '~/.cache/engineered_chatgpt_prompts'))
+        self.ttl_seconds = ttl_days * 24 * 3600
+        self.enabled = True
+
+    def key(self, model: str, messages: list) -> str:
+        """
+        derive the cache key of a request
+        :param model:
+            model to use
+        :param messages:
+            chat messages
+        :return:
+            sha256 hex key
+        """
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": 0},
+            sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str):
+        """
+        look up a fresh cached response
+        :param key:
+            cache key
+        :return:
+            cached response text, or None on miss or expired entry
+        """
+        if not self.enabled:
+            return None
+        entry = self.cache_dir / f"{key}.json"
+        try:
+            if time.time() - entry.stat().st_mtime > self.ttl_seconds:
+                return None
+            return json.loads(entry.read_text(encoding='utf-8'))["content"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set(self, key: str, content: str):
+        """
+        store a response
+        :param key:
+            cache key
+        :param content:
+            response text
+        :return:
+            void
+        """
+        if not self.enabled:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry = self.cache_dir / f"{key}.json"
+        entry.write_text(json.dumps({"content": content}), encoding='utf-8')
+
+
+cache = LLMCache()
+
+
+async def _create_with_retry(**kwargs):
+    """
+    call chat.completions.create retrying transient failures (rate
+    limits, timeouts, connection errors) with randomized exponential
+    backoff, so one 429 does not abort a whole directory run
+    :param kwargs:
+        arguments forwarded to chat.completions.create
+    :return:
+        the API response
+    """
+    import openai
+    from tenacity import (AsyncRetrying,
+                          retry_if_exception_type,
+                          stop_after_attempt,
+                          wait_random_exponential)
+    async for attempt in AsyncRetrying(
+            wait=wait_random_exponential(multiplier=1, max=60),
+            stop=stop_after_attempt(6),
+            retry=retry_if_exception_type((openai.RateLimitError,
+                                           openai.APITimeoutError,
+                                           openai.APIConnectionError)),
+            reraise=True):
+        with attempt:
+            return await _get_client().chat.completions.create(**kwargs)
+
+
+async def get_completion(messages,
+                         model=default_openai_model,
+                         prompt_cache_key=None,
+                         response_format=None):
+    """
+    method to query openai API
+    """
+    cache_key = cache.key(model, messages)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+    extra = {}
+    if response_format is not None:
+        extra["response_format"] = response_format
+    chat = await _create_with_retry(
+        model=model,
+        messages=messages,
+        temperature=0,
+        prompt_cache_key=prompt_cache_key,
+        # this is the randomness degree of the model's output
+        **extra,
+    )
+    content = chat.choices[0].message.content
+    cache.set(cache_key, content)
+    return content
+
+
+async def get_completion_stream(messages,
+                                model=default_openai_model,
+                                prompt_cache_key=None):
+    """
+    method to query openai API yielding the response token by token
+    """
+    cache_key = cache.key(model, messages)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        yield cached
+        return
+    stream = await _create_with_retry(
+        model=model,
+        messages=messages,
+        temperature=0,
+        prompt_cache_key=prompt_cache_key,
+        stream=True,
+    )
+    pieces = []
+    async for chunk in stream:
+        token = chunk.choices[0].delta.content
+        if token:
+            pieces.append(token)
+            yield token
+    cache.set(cache_key, "".join(pieces))
+
+
+def full_path_goal(input: str):
+    return f"goals/{input}"
+
+
+@functools.lru_cache(maxsize=32)
+def load_goal(goal: str) -> str:
+    """
+    read a goal file once and memoize it for the rest of the process
+    :param goal:
+        relative file path to goal file in ./goals directory
+    :return:
+        goal text
+    """
+    return pathlib.Path(full_path_goal(goal)).read_text(encoding='utf-8')
+
+
+def read_text_file(file) -> str:
+    """
+    read a text file, memory-mapping large ones so the kernel page
+    cache backs the data instead of an extra user-space read() buffer
+    :param file:
+        file path to read
+    :return:
+        decoded file content
+    """
+    path = pathlib.Path(file)
+    if path.stat().st_size < LARGE_FILE_THRESHOLD:
+        return path.read_text(encoding='utf-8')
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[:].decode('utf-8', errors='replace')
+
+
+def process_file(file: str, goal_text: str):
+    """
+    process a file with a goal
+    :param file:
+        file to process
+    :param goal_text:
+        goal text to apply
+    :return:
+        void
+    """
+    # read everything upfront so no file handle stays open across the
+    # seconds-long API call
+    file_text = read_text_file(file)
+    print(f"sending to openai file: {file} with goal:\n{goal_text}")
+    budget = (MODEL_CONTEXT_LIMIT - MAX_COMPLETION_TOKENS
+              - count_tokens(system_content(goal_text)))
+    if count_tokens(file_text) <= budget:
+        messages = build_messages(goal_text, file_text)
+        result = asyncio.run(get_completion(
+            messages, prompt_cache_key=goal_cache_key(goal_text)))
+    else:
+        # too large for one request: process windows concurrently
+        # instead of letting the API reject the call after the RTT
+        windows = split_to_windows(file_text, budget)
+        print(f"file exceeds the model context,"
+              f" split into {len(windows)} windows")
+
+        async def process_windows():
+            tasks = [get_completion(
+                build_messages(goal_text, window),
+                prompt_cache_key=goal_cache_key(goal_text))
+                for window in windows]
+            return await asyncio.gather(*tasks)
+
+        result = "\n\n".join(asyncio.run(process_windows()))
+    print(result)
+
+
+def is_text_file(file: pathlib.Path) -> bool:
+    """
+    check that a file looks like text (no NUL byte in its head)
+    :param file:
+        file to check
+    :return:
+        True when the file can be sent as text
+    """
+    try:
+        with open(file, 'rb') as f:
+            return b'\0' not in f.read(1024)
+    except OSError:
+        return False
+
+
+# timestamp formats recognized by the has_timestamp filter, compiled
+# once at import (one alternation scan instead of a grep per pattern)
+TIMESTAMP_PATTERN = re.compile(
+    r'[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}(\.[0-9]+)?Z'
+    r'|[0-9]{4}-[0-9]{2}-[0-9]{2} [0-9]{2}:[0-9]{2}:[0-9]{2}'
+    r'|[0-9]{4}/[0-9]{2}/[0-9]{2} [0-9]{2}:[0-9]{2}:[0-9]{2}'
+    r'|[0-9]{2}/[0-9]{2}/[0-9]{4} [0-9]{2}:[0-9]{2}:[0-9]{2} (AM|PM)')
+
+# file names accepted by the custom_files filter
+CUSTOM_FILES_PATTERN = re.compile(r'.*JOB.*_FAILED_.*\.txt$|.*cmon\.log$')
+
+
+def has_timestamp(file: pathlib.Path) -> bool:
+    """ True when the file content holds a recognizable timestamp """
+    return bool(TIMESTAMP_PATTERN.search(read_text_file(file)))
+
+
+def has_txt_extension(file: pathlib.Path) -> bool:
+    """ True when the file name ends in .txt """
+    return file.suffix == '.txt'
+
+
+def has_log_extension(file: pathlib.Path) -> bool:
+    """ True when the file name ends in .log """
+    return file.suffix == '.log'
+
+
+def custom_files(file: pathlib.Path) -> bool:
+    """ True for failed-job reports and cmon logs """
+    return bool(CUSTOM_FILES_PATTERN.match(str(file)))
+
+
+def is_cc_report_processable_file(file: pathlib.Path) -> bool:
+    """ True when any of the clustercontrol report filters accepts """
+    return (has_log_extension(file)
+            or has_txt_extension(file)
+            or has_timestamp(file))
+
+
+FILTERS = {
+    "has_timestamp": has_timestamp,
+    "has_txt_extension": has_txt_extension,
+    "has_log_extension": has_log_extension,
+    "custom_files": custom_files,
+    "is_cc_report_processable_file": is_cc_report_processable_file,
+}
+
+
+def passes_filter(file: pathlib.Path, ffilter: str) -> bool:
+    """
+    apply a named file filter; legacy ./utils/file_filters script names
+    keep working with or without their .sh suffix
+    :param file:
+        file to check
+    :param ffilter:
+        filter name
+    :return:
+        True when the filter accepts the file
+    """
+    name = ffilter[:-3] if ffilter.endswith('.sh') else ffilter
+    if name not in FILTERS:
+        raise Exception(f"Unknown filter: {ffilter}")
+    return FILTERS[name](file)
+
+
+def walk_files(dir: str, ffilter: str = ""):
+    """
+    walk a directory tree yielding its processable text files; uses
+    os.scandir recursively, which stats entries from the directory
+    read instead of one stat syscall per path
+    :param dir:
+        directory to walk
+    :param ffilter:
+        optional filter script name
+    :return:
+        iterator of file paths, sorted within each directory
+    """
+    with os.scandir(dir) as entries:
+        for entry in sorted(entries, key=lambda e: e.name):
+            if entry.is_dir(follow_symlinks=False):
+                yield from walk_files(entry.path, ffilter)
+            elif entry.is_file():
+                file = pathlib.Path(entry.path)
+                if not is_text_file(file):
+                    continue
+                if len(ffilter) != 0 and not passes_filter(file, ffilter):
+                    continue
+                yield file
+
+
+def list_files(dir: str, ffilter: str = "") -> list:
+    """
+    collect the processable text files of a directory tree
+    :param dir:
+        directory to walk
+    :param ffilter:
+        optional filter script name
+    :return:
+        list of file paths, sorted within each directory
+    """
+    return list(walk_files(dir, ffilter))
+
+
+async def read_all(files: list, concurrency: int = 32) -> list:
+    """
+    read many files concurrently with non-blocking file I/O, so the
+    per-file open+read latencies overlap instead of adding up; bounded
+    so large trees cannot exhaust the file-descriptor limit
+    :param files:
+        file paths to read
+    :param concurrency:
+        maximum number of files open at once
+    :return:
+        list of file contents in the same order as files
+    """
+    sem = asyncio.Semaphore(concurrency)
+
+    async def read_one(file):
+        async with sem:
+            # errors='replace' matches read_text_file: is_text_file
+            # admits any NUL-free file, not only strict utf-8
+            async with aiofiles.open(file, 'r', encoding='utf-8',
+                                     errors='replace') as f:
+                return await f.read()
+
+    return await asyncio.gather(*(read_one(file) for file in files))
+
+
+def pack_files(files: list, texts: list, max_tokens: int = 6000,
+               model: str = default_openai_model) -> list:
+    """
+    greedily bin-pack file contents into chunks fitting the model
+    context, so many small files share one completion request
+    :param files:
+        file paths to pack
+    :param texts:
+        file contents in the same order as files
+    :param max_tokens:
+        token budget of one chunk
+    :param model:
+        model whose tokenizer sizes the contents
+    :return:
+        list of chunks, each a list of (path, text) tuples; a file
+        larger than the budget contributes one tuple per window
+    """
+    enc = _encoding(model)
+    entries = []
+    for file, text in zip(files, texts):
+        if len(enc.encode(text)) > max_tokens:
+            # split locally instead of shipping a chunk the API would
+            # reject for exceeding the context after the round trip
+            for window in split_to_windows(text, max_tokens, model):
+                entries.append((file, window))
+        else:
+            entries.append((file, text))
+    chunks = []
+    chunk = []
+    used = 0
+    for file, text in entries:
+        size = len(enc.encode(text))
+        if chunk and used + size > max_tokens:
+            chunks.append(chunk)
+            chunk = []
+            used = 0
+        chunk.append((file, text))
+        used += size
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def build_packed_text(chunk: list) -> str:
+    """
+    serialize the documents of a chunk into one numbered user message
+    :param chunk:
+        list of (path, text) tuples
+    :return:
+        user message covering every document of the chunk
+    """
+    parts = [f"Apply the goal to each of the following {len(chunk)}"
+             f" documents. Return ONLY a JSON object of the form"
+             f' {{"results": [...]}} holding exactly {len(chunk)} strings,'
+             f" one result per document, in order.\n"]
+    for index, (file, text) in enumerate(chunk):
+        # keep the file path visible: several shipped goals correlate
+        # documents by name, as the old <file: path> labels did
+        parts.append(f"<<<DOC {index}: {file}>>>\n{text}\n")
+    return "".join(parts)
+
+
+async def process_many(files: list, goal_text: str, concurrency: int = 16):
+    """
+    query openai concurrently for many files sharing one goal, packing
+    small files together so one completion serves several documents
+    :param files:
+        file paths to process
+    :param goal_text:
+        goal text shared by every file
+    :param concurrency:
+        maximum number of in-flight API calls
+    :return:
+        list of responses (or exceptions) in the same order as files
+    """
+    sem = asyncio.Semaphore(concurrency)
+    done = 0
+
+    async def process_chunk(chunk, total):
+        nonlocal done
+        messages = build_messages(goal_text, build_packed_text(chunk))
+        async with sem:
+            answer = await get_completion(
+                messages,
+                prompt_cache_key=goal_cache_key(goal_text),
+                response_format={"type": "json_object"})
+        done += 1
+        print(f"[{done}/{total}] done", file=sys.stderr)
+        parsed = json.loads(answer)
+        results = parsed.get("results") if isinstance(parsed, dict) \
+            else parsed
+        if not isinstance(results, list) or len(results) != len(chunk):
+            raise Exception(f"Expected {len(chunk)} results,"
+                            f" got: {answer[:200]}")
+        return results
+
+    texts = await read_all(files)
+    chunks = pack_files(files, texts)
+    outcomes = await asyncio.gather(
+        *(process_chunk(chunk, len(chunks)) for chunk in chunks),
+        return_exceptions=True)
+    # one entry per packed document; an oversize file split into
+    # windows owns several consecutive entries
+    by_file = {}
+    for chunk, outcome in zip(chunks, outcomes):
+        for index, (file, _) in enumerate(chunk):
+            if isinstance(outcome, BaseException):
+                by_file.setdefault(file, []).append(outcome)
+            else:
+                by_file.setdefault(file, []).append(outcome[index])
+    results = []
+    for file in files:
+        parts = by_file.get(file, [])
+        failure = next(
+            (part for part in parts if isinstance(part, BaseException)),
+            None)
+        results.append(failure if failure is not None
+                       else "\n\n".join(parts))
+    return results
+
+
+async def run_batch(files: list, goal_text: str,
+                    model: str = default_openai_model) -> dict:
+    """
+    send one request per file through the OpenAI Batch API
+    :param files:
+        file paths to process
+    :param goal_text:
+        goal text shared by every file
+    :param model:
+        model to use
+    :return:
+        dict mapping file path to response text
+    """
+    requests = []
+    texts = await read_all(files)
+    for file, file_text in zip(files, texts):
+        requests.append({
+            "custom_id": str(file),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": model,
+                "messages": build_messages(goal_text, file_text),
+                "temperature": 0,
+                "prompt_cache_key": goal_cache_key(goal_text),
+            },
+        })
+    with tempfile.NamedTemporaryFile(
+            mode='w', suffix='.jsonl', delete=False) as temp_file:
+        for request in requests:
+            temp_file.write(json.dumps(request) + "\n")
+        temp_file_name = temp_file.name
+    client = _get_client()
+    try:
+        with open(temp_file_name, 'rb') as f:
+            batch_input = await client.files.create(file=f, purpose="batch")
+    finally:
+        os.remove(temp_file_name)
+    batch = await client.batches.create(
+        input_file_id=batch_input.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h")
+    print(f"batch {batch.id} submitted with {len(requests)} requests")
+    delay = 5
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 300)  # exponential backoff capped at 5 min
+        batch = await client.batches.retrieve(batch.id)
+        print(f"batch {batch.id} status: {batch.status}")
+    if batch.status != "completed":
+        raise Exception(f"Batch {batch.id} ended with status: {batch.status}")
+    output = await client.files.content(batch.output_file_id)
+    results = {}
+    for line in output.text.splitlines():
+        entry = json.loads(line)
+        response = entry["response"]["body"]
+        results[entry["custom_id"]] = (
+            response["choices"][0]["message"]["content"])
+    return results
+
+
+def process_directory_batch(dir: str, goal: str, ffilter: str = ""):
+    """
+    process a directory with a goal through the Batch API
+    :param dir:
+        directory to process
+    :param goal:
+        goal to process
+    :param ffilter:
+        optional filter script name
+    :return:
+        void
+    """
+    goal_text = load_goal(goal)
+    files = list_files(dir, ffilter)
+    print(f"sending to openai batch {len(files)} files from: {dir}"
+          f" with goal:\n{goal_text}")
+    results = asyncio.run(run_batch(files, goal_text))
+    for file in files:
+        print(f"\n<file: {file}>")
+        print(results.get(str(file), "<no response in batch output>"))
+
+
+def process_directory(dir: str, goal: str, ffilter: str = ""):
+    """
+    process a directory with a goal
+    :param directory:
+        directory to process
+    :param goal:
+        goal to process
+    :return:
+        void
+    """
+    goal_text = load_goal(goal)
+    files = list_files(dir, ffilter)
+    print(f"sending to openai {len(files)} files from: {dir}"
+          f" with goal:\n{goal_text}")
+    results = asyncio.run(process_many(files, goal_text))
+    for file, result in zip(files, results):
+        print(f"\n<file: {file}>")
+        print(result)
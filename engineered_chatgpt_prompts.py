@@ -5,55 +5,15 @@ by the chatgpt model to generate the output text.
 """
 
 import argparse
-import asyncio
 import os
-import sys
 
-import openai
-from dotenv import load_dotenv, find_dotenv
-from PyQt5.QtWidgets import (QApplication,  # pylint: disable=no-name-in-module
-                             QWidget,
-                             QVBoxLayout,
-                             QHBoxLayout,
-                             QLabel,
-                             QFileDialog,
-                             QTextEdit,
-                             QPushButton)
-
-_ = load_dotenv(find_dotenv())  # read local .env file
-# default_openai_model = "gpt-4o"
-default_openai_model = "gpt-3.5-turbo"
-# default_openai_model = "text-embedding-3-small"
-# default_openai_model = "text-embedding-3-large"
-# default_openai_model = "gpt-4-1106-vision-preview"
-
-openai.api_key = os.getenv('OPENAI_API_KEY')
-openai.organization = os.getenv('OPENAI_ORGANIZATION')
-openai.project = os.getenv('OPENAI_PROJECT')
-
-print("OpenAI version:", openai.__version__)
-last_response = ""  # pylint: disable=invalid-name,redefined-outer-name
-
-
-async def get_completion(prompt,
-                         model=default_openai_model):
-    """
-    method to query openai API
-    """
-    messages = [{"role": "user", "content": prompt}]
-    chat = openai.ChatCompletion.create(
-        model=model,
-        messages=messages,
-        temperature=0,
-        # stream=True,
-        # this is the randomness degree of the model's output
-    )
-    global last_response  # pylint: disable=global-statement
-    last_response = chat.choices[0].message[
-        "content"]  # pylint: disable=invalid-name,redefined-outer-name
-    sys.stdout.write(f"\r{last_response}>")
-    sys.stdout.flush()
-    return last_response
+from core import (cache,
+                  FILTERS,
+                  full_path_goal,
+                  load_goal,
+                  process_directory,
+                  process_directory_batch,
+                  process_file)
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -86,16 +46,26 @@ def parse_arguments() -> argparse.Namespace:
                         default=None, type=str,
                         help="relative file path to goal file in"
                              " ./goals directory")
+    parser.add_argument('-b', "--batch", required=False,
+                        dest='batch',
+                        default=False, action='store_true',
+                        help="process the directory through the OpenAI"
+                             " Batch API (half cost, up to 24h turnaround)")
+    parser.add_argument("--no-cache", required=False,
+                        dest='no_cache',
+                        default=False, action='store_true',
+                        help="disable the on-disk response cache")
+    parser.add_argument("--cache-ttl", required=False,
+                        dest='cache_ttl',
+                        default=7, type=float,
+                        help="days a cached response stays valid"
+                             " (default: 7)")
     parser.add_argument('-t', "--filter", required=False,
                         dest='ffilter',
                         default="", type=str,
-                        help="relative file path to filter file in"
-                             " ./utils/file_filters directory")
-    args_namespace = parser.parse_args()
-    if hasattr(args_namespace, 'help'):
-        parser.print_help()
-        exit(0)
-    return args_namespace
+                        help="name of a built-in file filter"
+                             " (e.g. has_timestamp, custom_files)")
+    return parser.parse_args()
 
 
 def check_arguments(_args: argparse.Namespace):
@@ -117,10 +87,13 @@ def check_arguments(_args: argparse.Namespace):
             if not os.path.exists(goal_file):
                 raise Exception(f"Goal file does not exist: {goal_file}")
             if len(_args.ffilter) != 0:
-                filter_file = full_path_filter(_args.ffilter)
-                print(f"Filter file: {filter_file}")
-                if not os.path.exists(filter_file):
-                    raise Exception(f"Filter file does not exist: {filter_file}")
+                name = _args.ffilter[:-3] \
+                    if _args.ffilter.endswith('.sh') else _args.ffilter
+                print(f"Filter: {name}")
+                if name not in FILTERS:
+                    raise Exception(
+                        f"Unknown filter: {_args.ffilter},"
+                        f" available: {', '.join(sorted(FILTERS))}")
     if _args.dir is not None:
         if not os.path.exists(_args.dir):
             raise Exception(f"Directory does not exist: {_args.dir}")
@@ -129,191 +102,21 @@ def check_arguments(_args: argparse.Namespace):
             raise Exception(f"File does not exist: {_args.file}")
 
 
-def full_path_goal(input: str):
-    return f"goals/{input}"
-
-
-def full_path_filter(input: str):
-    return f"utils/file_filters/{input}"
-
-
-def process_file(file: str, goal: str):
-    """
-    process a file with a goal
-    :param file:
-        file to process
-    :param goal:
-        goal to process
-    :return:
-        void
-    """
-    with open(file, 'r', encoding='utf-8') as f:
-        gf = open(full_path_goal(goal), 'r', encoding='utf-8')
-        goal_text = gf.read()
-        gf.close()
-        file_text = f.read()
-        print(f"sending to openai file: {file} with goal:\n{goal_text}")
-        full_prompt = (f"with the following goal "
-                       f"(delimited by triple backticks): ```{goal_text}```"
-                       f"process the following text with specified goal"
-                       f"(delimited by triple backticks): ```{file_text}```")
-        asyncio.run(get_completion(full_prompt))
-        print(last_response)
-
-
-def process_directory(dir: str, goal: str, ffilter: str = ""):
-    """
-    process a directory with a goal
-    :param directory:
-        directory to process
-    :param goal:
-        goal to process
-    :return:
-        void
-    """
-    import subprocess
-    import time
-    import tempfile
-    # ffilter = "has_timestamp.sh"
-    with tempfile.NamedTemporaryFile(mode='w', delete=False) as temp_file:
-        timestamp = str(int(time.time()))
-        temp_file_name = temp_file.name
-        temp_file.close()
-        print(f"Executing: ./utils/serialize_dir.sh"
-              f" {dir} {temp_file_name} {ffilter}")
-        subprocess.run(
-            ['bash', 'utils/serialize_dir.sh', dir, temp_file_name, ffilter])
-        process_file(temp_file_name, goal)
-        os.remove(temp_file_name)
-
-
-class EngineeredChatgptPrompts(
-    QWidget):  # pylint: disable=too-many-instance-attributes
-    """
-    class to hold widgets and process method of main application
-    """
-
-    def __init__(self):
-        super().__init__()
-
-        # Create widgets
-        self.goal_label = QLabel('Enter Goal:')
-        self.goal_text = QTextEdit()
-        self.clear_goal_button = QPushButton('Clear')
-        self.load_goal_button = QPushButton('Load')
-        self.save_goal_button = QPushButton('Save')
-        self.input_text_label = QLabel('Enter input text:')
-        self.input_text = QTextEdit()
-        self.clear_input_button = QPushButton('Clear input')
-        self.process_button = QPushButton('Process')
-        self.result_label = QLabel('Processed Text:')
-        self.output_text = QTextEdit()
-
-        height = 400
-        output_text_height = 200
-        width = 800
-        self.goal_text.setFixedSize(width, 70)
-        self.input_text.setFixedSize(width, height)
-        self.output_text.setFixedSize(width, output_text_height)
-        # Enable word wrap for both text input and result label
-        self.goal_text.setLineWrapMode(QTextEdit.WidgetWidth)
-        self.input_text.setLineWrapMode(QTextEdit.WidgetWidth)
-        self.output_text.setLineWrapMode(QTextEdit.WidgetWidth)
-        self.output_text.setReadOnly(True)
-
-        # set horizontal layouts (for buttons)
-        self.goal_buttons_layout = QHBoxLayout()
-        self.goal_buttons_layout.addWidget(self.clear_goal_button)
-        self.goal_buttons_layout.addWidget(self.load_goal_button)
-        self.goal_buttons_layout.addWidget(self.save_goal_button)
-        self.process_buttons_layout = QHBoxLayout()
-        self.process_buttons_layout.addWidget(self.clear_input_button)
-        self.process_buttons_layout.addWidget(self.process_button)
-
-        # Set up main main_layout
-        main_layout = QVBoxLayout()
-        main_layout.addWidget(self.goal_label)
-        main_layout.addWidget(self.goal_text)
-        main_layout.addLayout(self.goal_buttons_layout)
-        main_layout.addWidget(self.input_text_label)
-        main_layout.addWidget(self.input_text)
-        main_layout.addLayout(self.process_buttons_layout)
-        main_layout.addWidget(self.result_label)
-        main_layout.addWidget(self.output_text)
-
-        # Set the main_layout for the main window
-        self.setLayout(main_layout)
-
-        # Connect the button click event to the process_text method
-        self.load_goal_button.clicked.connect(self.load_goal)
-        self.save_goal_button.clicked.connect(self.save_goal)
-        self.clear_goal_button.clicked.connect(self.clear_goal)
-        self.process_button.clicked.connect(self.process_text)
-        self.clear_input_button.clicked.connect(self.clear_input)
-
-        # Set up the main window
-        self.setWindowTitle('engineered chatgpt prompts')
-        self.show()
-
-    def process_text(self):
-        """ send engineered prompt to openai API and set result on output """
-        input_text = self.input_text.toPlainText()
-        goal = self.goal_text.toPlainText()
-        # Perform processing on the input text (replace with your own logic)
-        if len(goal) < 2:
-            goal = "summarize in 2 sentence"
-        full_prompt = (f"with the following goal "
-                       f"(delimited by triple backticks): ```{goal}```"
-                       f"process the following text with specified goal"
-                       f"(delimited by triple backticks): ```{input_text}```")
-        asyncio.run(get_completion(full_prompt))
-        global last_response  # pylint: disable=global-statement
-        self.output_text.setPlainText(last_response)
-
-    def load_goal(self):
-        """ open a dialog inspecting text files on file system """
-        filename = QFileDialog.getOpenFileName(self,
-                                               'Open File',
-                                               '.',
-                                               'Text Files (*.txt)')
-        if filename[0]:
-            with open(filename[0], 'r', encoding='utf-8') as f:
-                file_text = f.read()
-                self.goal_text.setText(file_text)
-
-    def save_goal(self):
-        """ save goal text into system file """
-        filename = QFileDialog.getSaveFileName(self,
-                                               'Save File',
-                                               '.',
-                                               'Text Files (*.txt)')
-        if filename[0]:
-            file = filename[0]
-            if not filename[0].endswith('.txt'):
-                file += '.txt'
-            with open(file, 'w', encoding='utf-8') as f:
-                my_text = self.goal_text.toPlainText()
-                f.write(my_text)
-
-    def clear_goal(self):
-        """ clean goal text box """
-        self.goal_text.setText('')
-
-    def clear_input(self):
-        """ clean input text box """
-        self.input_text.setText('')
-
-
 if __name__ == '__main__':
     args = parse_arguments()
     check_arguments(args)
+    cache.enabled = not args.no_cache
+    cache.ttl_seconds = args.cache_ttl * 24 * 3600
     if args.dir is not None:
         print(f"Processing directory: {args.dir}\nwith goal: {args.goal}")
-        process_directory(args.dir, args.goal, args.ffilter)
+        if args.batch:
+            process_directory_batch(args.dir, args.goal, args.ffilter)
+        else:
+            process_directory(args.dir, args.goal, args.ffilter)
     elif args.file is not None:
-        process_file(args.file, args.goal)
+        process_file(args.file, load_goal(args.goal))
         print(f"Processing file: {args.file}\nwith goal: {args.goal}")
     else:
-        app = QApplication([])
-        window = EngineeredChatgptPrompts()
-        app.exec_()
+        # deferred so batch-mode runs never load the Qt libraries
+        from gui import run_gui
+        run_gui()
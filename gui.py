@@ -0,0 +1,194 @@
+"""
+PyQt5 window of the application; kept in its own module so batch CLI
+runs never import the Qt libraries.
+"""
+
+import asyncio
+
+import qasync
+from PyQt5.QtGui import QTextCursor  # pylint: disable=no-name-in-module
+from PyQt5.QtWidgets import (QApplication,  # pylint: disable=no-name-in-module
+                             QWidget,
+                             QVBoxLayout,
+                             QHBoxLayout,
+                             QLabel,
+                             QFileDialog,
+                             QTextEdit,
+                             QPushButton)
+
+from core import (MODEL_CONTEXT_LIMIT,
+                  MAX_COMPLETION_TOKENS,
+                  build_messages,
+                  count_tokens,
+                  goal_cache_key,
+                  get_completion_stream,
+                  system_content)
+
+
+class EngineeredChatgptPrompts(
+    QWidget):  # pylint: disable=too-many-instance-attributes
+    """
+    class to hold widgets and process method of main application
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        # Create widgets
+        self.goal_label = QLabel('Enter Goal:')
+        self.goal_text = QTextEdit()
+        self.clear_goal_button = QPushButton('Clear')
+        self.load_goal_button = QPushButton('Load')
+        self.save_goal_button = QPushButton('Save')
+        self.input_text_label = QLabel('Enter input text:')
+        self.input_text = QTextEdit()
+        self.clear_input_button = QPushButton('Clear input')
+        self.process_button = QPushButton('Process')
+        self.cancel_button = QPushButton('Cancel')
+        self.result_label = QLabel('Processed Text:')
+        self.output_text = QTextEdit()
+        self._task = None  # in-flight processing task, if any
+
+        height = 400
+        output_text_height = 200
+        width = 800
+        self.goal_text.setFixedSize(width, 70)
+        self.input_text.setFixedSize(width, height)
+        self.output_text.setFixedSize(width, output_text_height)
+        # Enable word wrap for both text input and result label
+        self.goal_text.setLineWrapMode(QTextEdit.WidgetWidth)
+        self.input_text.setLineWrapMode(QTextEdit.WidgetWidth)
+        self.output_text.setLineWrapMode(QTextEdit.WidgetWidth)
+        self.output_text.setReadOnly(True)
+        # streamed tokens are never undone; skip the undo stack upkeep
+        self.output_text.setUndoRedoEnabled(False)
+
+        # set horizontal layouts (for buttons)
+        self.goal_buttons_layout = QHBoxLayout()
+        self.goal_buttons_layout.addWidget(self.clear_goal_button)
+        self.goal_buttons_layout.addWidget(self.load_goal_button)
+        self.goal_buttons_layout.addWidget(self.save_goal_button)
+        self.process_buttons_layout = QHBoxLayout()
+        self.process_buttons_layout.addWidget(self.clear_input_button)
+        self.process_buttons_layout.addWidget(self.process_button)
+        self.process_buttons_layout.addWidget(self.cancel_button)
+
+        # Set up main main_layout
+        main_layout = QVBoxLayout()
+        main_layout.addWidget(self.goal_label)
+        main_layout.addWidget(self.goal_text)
+        main_layout.addLayout(self.goal_buttons_layout)
+        main_layout.addWidget(self.input_text_label)
+        main_layout.addWidget(self.input_text)
+        main_layout.addLayout(self.process_buttons_layout)
+        main_layout.addWidget(self.result_label)
+        main_layout.addWidget(self.output_text)
+
+        # Set the main_layout for the main window
+        self.setLayout(main_layout)
+
+        # Connect the button click event to the process_text method
+        self.load_goal_button.clicked.connect(self.load_goal)
+        self.save_goal_button.clicked.connect(self.save_goal)
+        self.clear_goal_button.clicked.connect(self.clear_goal)
+        self.process_button.clicked.connect(self.start_processing)
+        self.cancel_button.clicked.connect(self.cancel_processing)
+        self.clear_input_button.clicked.connect(self.clear_input)
+
+        # Set up the main window
+        self.setWindowTitle('engineered chatgpt prompts')
+        self.show()
+
+    def start_processing(self):
+        """ launch process_text as a cancellable background task """
+        if self._task is not None and not self._task.done():
+            return  # a request is already running
+        self._task = asyncio.ensure_future(self.process_text())
+        self._task.add_done_callback(self.processing_done)
+
+    def processing_done(self, task):
+        """ surface a failed completion on the output box """
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.output_text.setPlainText(f"Error: {error}")
+
+    def cancel_processing(self):
+        """ cancel the in-flight completion, if any """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    async def process_text(self):
+        """ send engineered prompt to openai API streaming the result
+        token by token on output """
+        input_text = self.input_text.toPlainText()
+        goal = self.goal_text.toPlainText()
+        # Perform processing on the input text (replace with your own logic)
+        if len(goal) < 2:
+            goal = "summarize in 2 sentence"
+        # validate the length locally instead of bouncing an oversize
+        # prompt off the API after a full round trip
+        budget = (MODEL_CONTEXT_LIMIT - MAX_COMPLETION_TOKENS
+                  - count_tokens(system_content(goal)))
+        input_tokens = count_tokens(input_text)
+        if input_tokens > budget:
+            self.output_text.setPlainText(
+                f"Input is {input_tokens} tokens but only {budget} fit the"
+                f" model context with this goal; please shorten the input"
+                f" or process it as a file in command line mode.")
+            return
+        messages = build_messages(goal, input_text)
+        self.output_text.setPlainText('')
+        # append through a cursor held at the end so each token only
+        # lays out the last block instead of the whole document
+        cursor = self.output_text.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        async for token in get_completion_stream(
+                messages, prompt_cache_key=goal_cache_key(goal)):
+            cursor.insertText(token)
+            self.output_text.setTextCursor(cursor)
+
+    def load_goal(self):
+        """ open a dialog inspecting text files on file system """
+        filename = QFileDialog.getOpenFileName(self,
+                                               'Open File',
+                                               '.',
+                                               'Text Files (*.txt)')
+        if filename[0]:
+            with open(filename[0], 'r', encoding='utf-8') as f:
+                file_text = f.read()
+                self.goal_text.setText(file_text)
+
+    def save_goal(self):
+        """ save goal text into system file """
+        filename = QFileDialog.getSaveFileName(self,
+                                               'Save File',
+                                               '.',
+                                               'Text Files (*.txt)')
+        if filename[0]:
+            file = filename[0]
+            if not filename[0].endswith('.txt'):
+                file += '.txt'
+            with open(file, 'w', encoding='utf-8') as f:
+                my_text = self.goal_text.toPlainText()
+                f.write(my_text)
+
+    def clear_goal(self):
+        """ clean goal text box """
+        self.goal_text.setText('')
+
+    def clear_input(self):
+        """ clean input text box """
+        self.input_text.setText('')
+
+
+def run_gui():
+    """ launch the application window on a persistent qasync event loop """
+    app = QApplication([])
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    # keep a reference so the window is not garbage collected
+    window = EngineeredChatgptPrompts()  # pylint: disable=unused-variable
+    with loop:
+        loop.run_forever()